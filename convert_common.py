@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换脚本共用的工具函数
+
+md_converter.py、md_to_xmind.py、xmind_to_md.py 共用的标题解析和批量转换逻辑放在这里，
+避免在各脚本中各自复制一份。
+"""
+
+import os
+import sys
+import glob
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+# Windows 上 ProcessPoolExecutor 的 max_workers 上限
+_WINDOWS_MAX_WORKERS = 61
+
+
+def match_header(line: str) -> Optional[Tuple[int, str]]:
+    """
+    识别标题行，等价于正则 ^(#{1,6})\\s+(.+)$，但不进入正则引擎
+
+    标题内容统一为 NFC 形式，等价的标题（如组合字符写法不同）得到相同的字符串。
+
+    Args:
+        line: 已去除首尾空白、且以 # 开头的行
+
+    Returns:
+        (标题级别, 标题内容)，不是标题时返回 None
+    """
+    n = 1
+    length = len(line)
+    while n < 6 and n < length and line[n] == '#':
+        n += 1
+    # # 之后必须紧跟空白字符，且标题内容不能为空
+    if n >= length or not line[n].isspace():
+        return None
+    title = line[n + 1:].strip()
+    if not title:
+        return None
+    return n, unicodedata.normalize('NFC', title)
+
+
+def batch_max_workers(task_count: int) -> int:
+    """
+    批量转换时的工作进程数
+
+    不超过任务数和 CPU 核数；Windows 上 ProcessPoolExecutor 最多只支持 61 个进程。
+
+    Args:
+        task_count: 待转换的文件数
+
+    Returns:
+        工作进程数
+    """
+    workers = min(task_count, os.cpu_count() or 1)
+    if sys.platform == 'win32':
+        workers = min(workers, _WINDOWS_MAX_WORKERS)
+    return max(workers, 1)
+
+
+def is_batch_input(path: str) -> bool:
+    """
+    判断命令行输入是否需要批量转换（目录，或不是现有文件的通配符）
+
+    Args:
+        path: 命令行输入的路径
+
+    Returns:
+        需要批量转换时返回 True
+    """
+    if os.path.isdir(path):
+        return True
+    return not os.path.exists(path) and any(ch in path for ch in '*?[')
+
+
+def expand_inputs(pattern: str, extension: str, exclude_suffix: Optional[str] = None) -> List[str]:
+    """
+    将目录或通配符展开为待转换的文件列表
+
+    Args:
+        pattern: 目录路径或通配符（如 docs/*.md）
+        extension: 目录输入时匹配的扩展名（如 .md）
+        exclude_suffix: 需要跳过的文件名后缀（如工具自身生成的输出文件）
+
+    Returns:
+        排序后的文件列表
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*' + extension)
+    return sorted(path for path in glob.glob(pattern)
+                  if os.path.isfile(path) and not (exclude_suffix and path.endswith(exclude_suffix)))
+
+
+def batch_output_paths(paths: List[str], output_dir: Optional[str], suffix: str) -> List[str]:
+    """
+    生成批量转换的输出文件路径
+
+    指定输出目录时，以所有输入文件所在目录的公共上级为基准保留相对子目录，
+    不同目录下的同名文件不会写到同一个输出文件。
+
+    Args:
+        paths: 输入文件路径列表
+        output_dir: 输出目录，为 None 时输出到各输入文件所在目录
+        suffix: 输出文件名后缀（替换原扩展名）
+
+    Returns:
+        与 paths 一一对应的输出文件路径
+
+    Raises:
+        ValueError: 两个输入文件仍会输出到同一路径时（如同目录下的 a.md 和 a.markdown）
+    """
+    dirs = [os.path.dirname(os.path.abspath(path)) for path in paths]
+    base = os.path.commonpath(dirs) if dirs else ''
+    output_files = []
+    seen = {}
+    for path, directory in zip(paths, dirs):
+        name = os.path.splitext(os.path.basename(path))[0] + suffix
+        if output_dir is None:
+            output_file = os.path.join(os.path.dirname(path), name)
+        else:
+            output_file = os.path.normpath(os.path.join(output_dir, os.path.relpath(directory, base), name))
+        key = os.path.normcase(os.path.abspath(output_file))
+        if key in seen:
+            raise ValueError(f"{seen[key]} 和 {path} 会输出到同一个文件: {output_file}")
+        seen[key] = path
+        output_files.append(output_file)
+    return output_files
+
+
+def batch_convert(converter_cls: type, method: str, paths: List[str], output_dir: Optional[str],
+                  suffix: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    使用多进程批量转换多个文件
+
+    每个文件在工作进程中执行 converter_cls().<method>(输入文件, 输出文件)，
+    方法返回 False 或抛出异常都视为转换失败。
+
+    Args:
+        converter_cls: 转换器类
+        method: 转换单个文件的方法名
+        paths: 输入文件路径列表
+        output_dir: 输出目录，为 None 时输出到各输入文件所在目录
+        suffix: 输出文件名后缀（替换原扩展名）
+
+    Returns:
+        (输入文件, 输出文件) 列表，转换失败时输出文件为 None
+
+    Raises:
+        ValueError: 两个输入文件会输出到同一路径时
+    """
+    output_files = batch_output_paths(paths, output_dir, suffix)
+    # 输出目录可能尚不存在，分发给工作进程前统一创建
+    for directory in {os.path.dirname(output_file) for output_file in output_files}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    classes = [converter_cls] * len(paths)
+    methods = [method] * len(paths)
+    if len(paths) <= 1:
+        # 单个文件无需启动进程池
+        results = list(map(_convert_one, classes, methods, paths, output_files))
+    else:
+        with ProcessPoolExecutor(max_workers=batch_max_workers(len(paths))) as executor:
+            results = list(executor.map(_convert_one, classes, methods, paths, output_files))
+    return list(zip(paths, results))
+
+
+def _convert_one(converter_cls: type, method: str, input_file: str, output_file: str) -> Optional[str]:
+    """
+    在工作进程中转换单个文件
+
+    Returns:
+        输出文件路径，转换失败时返回 None
+    """
+    try:
+        if getattr(converter_cls(), method)(input_file, output_file) is False:
+            return None
+        return output_file
+    except Exception as e:
+        print(f"转换失败: {input_file}: {str(e)}")
+        return None
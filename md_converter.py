@@ -7,18 +7,29 @@ Markdown转换工具
 版本：1.0
 """
 
-import re
 import os
 import sys
-from typing import List, Tuple
+from itertools import compress, count, repeat
+from operator import contains
+from typing import List, Optional, Tuple
+
+from convert_common import batch_convert, expand_inputs, is_batch_input, match_header
+
+# 自动生成的输出文件名后缀
+_OUTPUT_SUFFIX = "（转换版）.md"
+
+# 已确认存在的输出目录，批量转换到同一目录时无需反复创建
+_KNOWN_DIRS = set()
 
 
 class MarkdownConverter:
     """Markdown转换器类"""
     
     def __init__(self):
-        self.content = ""
         self.converted_content = ""
+        self._lines: List[str] = []
+        self._headers: Optional[List[Tuple[int, int, str, str]]] = None
+        self._header_counts: List[int] = [0] * 7  # 下标为标题级别
     
     def read_file(self, file_path: str) -> bool:
         """读取Markdown文件
@@ -30,8 +41,17 @@ class MarkdownConverter:
             bool: 读取成功返回True，失败返回False
         """
         try:
+            # 逐行读取，不再先读成整段字符串再切分；后续解析、转换、统计共用
+            lines = []
+            line = ''
             with open(file_path, 'r', encoding='utf-8') as f:
-                self.content = f.read()
+                for line in f:
+                    lines.append(line[:-1] if line.endswith('\n') else line)
+            # 与 split('\n') 保持一致：以换行结尾（或空文件）时末尾还有一个空行
+            if line.endswith('\n') or not lines:
+                lines.append('')
+            self._lines = lines
+            self._headers = None
             return True
         except FileNotFoundError:
             print(f"错误：文件 {file_path} 不存在")
@@ -40,80 +60,68 @@ class MarkdownConverter:
             print(f"错误：读取文件时发生异常 - {e}")
             return False
     
-    def parse_headers(self) -> List[Tuple[int, str, str]]:
+    def parse_headers(self) -> List[Tuple[int, int, str, str]]:
         """解析标题结构
         
         Returns:
-            List[Tuple[int, str, str]]: 包含(行号, 标题级别, 标题内容)的列表
+            List[Tuple[int, int, str, str]]: 包含(行号, 标题级别, 标题内容, 所属二级标题)的列表
         """
-        lines = self.content.split('\n')
         headers = []
+        # 各级标题数量，解析时顺带统计
+        counts = [0] * 7
+        # 解析时顺带记录最近的二级标题，三级标题无需再向前查找
+        last_h2_title = "未分类"
         
-        for i, line in enumerate(lines):
+        lines = self._lines
+        # 先在 C 层批量筛出含 # 的行（map/compress 不执行逐行的 Python 字节码，
+        # 也不为每行创建新字符串），Python 循环只处理这些候选行
+        candidates = compress(count(), map(contains, lines, repeat('#')))
+        for i in candidates:
+            line = lines[i].strip()
+            # 只有以 # 开头的才可能是标题
+            if not line.startswith('#'):
+                continue
             # 匹配标题行
-            match = re.match(r'^(#{1,6})\s+(.+)$', line.strip())
+            match = match_header(line)
             if match:
-                level = len(match.group(1))  # 标题级别
-                title = match.group(2).strip()  # 标题内容
-                headers.append((i, level, title))
+                level, title = match  # 标题级别, 标题内容（已统一为 NFC）
+                if level == 2:
+                    last_h2_title = title
+                counts[level] += 1
+                headers.append((i, level, title, last_h2_title))
         
+        self._headers = headers
+        self._header_counts = counts
         return headers
     
-    def find_parent_h2(self, headers: List[Tuple[int, str, str]], h3_index: int) -> str:
-        """查找三级标题对应的二级标题
-        
-        Args:
-            headers: 标题列表
-            h3_index: 三级标题在headers中的索引
-            
-        Returns:
-            str: 对应的二级标题内容
-        """
-        # 向前查找最近的二级标题
-        for i in range(h3_index - 1, -1, -1):
-            if headers[i][1] == 2:  # 找到二级标题
-                return headers[i][2]
-        
-        # 如果没找到二级标题，返回默认值
-        return "未分类"
-    
     def convert(self) -> str:
         """执行转换
         
         Returns:
             str: 转换后的内容
         """
-        if not self.content:
+        if not self._lines:
             return ""
         
-        lines = self.content.split('\n')
         headers = self.parse_headers()
         result_lines = []
         
-        for i, line in enumerate(lines):
+        # 建立 行号 -> 标题 的索引，避免对每一行都线性扫描整个标题列表
+        header_by_line = {header[0]: header for header in headers}
+        
+        for i, line in enumerate(self._lines):
+            hdr = header_by_line.get(i)
             # 检查当前行是否是二级标题
-            is_h2 = False
+            is_h2 = hdr is not None and hdr[1] == 2
             # 检查当前行是否是三级标题
-            is_h3 = False
-            h3_title = ""
-            parent_h2 = ""
-            
-            for j, (line_num, level, title) in enumerate(headers):
-                if line_num == i:
-                    if level == 2:
-                        is_h2 = True
-                    elif level == 3:
-                        is_h3 = True
-                        h3_title = title
-                        parent_h2 = self.find_parent_h2(headers, j)
-                    break
+            is_h3 = hdr is not None and hdr[1] == 3
             
             if is_h2:
                 # 跳过原有的二级标题，因为我们会为每个三级标题重新生成
                 continue
             elif is_h3:
                 # 在三级标题前添加对应的二级标题
-                result_lines.append(f"## {parent_h2}")
+                result_lines.append(f"## {hdr[3]}")
                 result_lines.append(line)
             else:
                 result_lines.append(line)
@@ -131,12 +139,24 @@ class MarkdownConverter:
             bool: 保存成功返回True，失败返回False
         """
         try:
-            # 确保输出目录存在
+            # 确保输出目录存在，以绝对路径记录，切换工作目录后仍然有效
             output_dir = os.path.dirname(output_path)
-            if output_dir:  # 只有当目录不为空时才创建
+            dir_key = os.path.abspath(output_dir) if output_dir else None
+            if dir_key and dir_key not in _KNOWN_DIRS:  # 只有当目录不为空且未确认过时才创建
                 os.makedirs(output_dir, exist_ok=True)
+                _KNOWN_DIRS.add(dir_key)
             
-            with open(output_path, 'w', encoding='utf-8') as f:
+            try:
+                f = open(output_path, 'w', encoding='utf-8')
+            except FileNotFoundError:
+                if not dir_key:
+                    raise
+                # 已记录的目录可能在此期间被删除，重新创建后重试一次
+                _KNOWN_DIRS.discard(dir_key)
+                os.makedirs(output_dir, exist_ok=True)
+                _KNOWN_DIRS.add(dir_key)
+                f = open(output_path, 'w', encoding='utf-8')
+            with f:
                 f.write(self.converted_content)
             return True
         except Exception as e:
@@ -149,35 +169,116 @@ class MarkdownConverter:
         Returns:
             dict: 包含统计信息的字典
         """
-        headers = self.parse_headers()
-        h1_count = sum(1 for _, level, _ in headers if level == 1)
-        h2_count = sum(1 for _, level, _ in headers if level == 2)
-        h3_count = sum(1 for _, level, _ in headers if level == 3)
+        # 复用 convert 时已解析的标题及各级数量，避免重复解析和统计
+        if self._headers is None:
+            self.parse_headers()
+        h1_count, h2_count, h3_count = self._header_counts[1:4]
         
         return {
-            'total_lines': len(self.content.split('\n')),
+            'total_lines': len(self._lines),
             'h1_count': h1_count,
             'h2_count': h2_count,
             'h3_count': h3_count,
             'converted_h2_count': h2_count + h3_count  # 转换后的二级标题数量
         }
+    
+    def convert_file(self, input_file: str, output_file: str) -> bool:
+        """读取、转换并保存单个文件
+        
+        Args:
+            input_file: 输入文件路径
+            output_file: 输出文件路径
+            
+        Returns:
+            bool: 转换成功返回True，失败返回False
+        """
+        if not self.read_file(input_file):
+            return False
+        self.convert()
+        return self.save_file(output_file)
+    
+    @classmethod
+    def batch_convert(cls, paths: List[str], output_dir: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """使用多进程批量转换多个文件
+        
+        Args:
+            paths: 输入文件路径列表
+            output_dir: 输出目录（保留输入文件的相对子目录），为None时输出到各输入文件所在目录
+            
+        Returns:
+            List[Tuple[str, Optional[str]]]: (输入文件, 输出文件)列表，转换失败时输出文件为None
+            
+        Raises:
+            ValueError: 两个输入文件会输出到同一路径时
+        """
+        return batch_convert(cls, 'convert_file', paths, output_dir, _OUTPUT_SUFFIX)
+
+
+def _default_output_path(input_file: str) -> str:
+    """生成默认的输出文件路径
+    
+    Args:
+        input_file: 输入文件路径
+        
+    Returns:
+        str: 与输入文件同目录的输出文件路径
+    """
+    base_name = os.path.splitext(input_file)[0]
+    return f"{base_name}{_OUTPUT_SUFFIX}"
+
+
+def _batch_main(pattern: str, output_dir: Optional[str] = None):
+    """批量转换入口
+    
+    Args:
+        pattern: 目录路径或通配符
+        output_dir: 输出目录
+    """
+    paths = expand_inputs(pattern, '.md', exclude_suffix=_OUTPUT_SUFFIX)
+    if not paths:
+        print(f"错误：{pattern} 中没有找到Markdown文件")
+        sys.exit(1)
+    
+    print(f"正在批量转换 {len(paths)} 个文件...")
+    try:
+        results = MarkdownConverter.batch_convert(paths, output_dir)
+    except ValueError as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+    failed = [path for path, output_file in results if output_file is None]
+    for path, output_file in results:
+        if output_file is not None:
+            print(f"{path} -> {output_file}")
+    
+    print(f"\n批量转换完成！成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+    if failed:
+        for path in failed:
+            print(f"转换失败: {path}")
+        sys.exit(1)
 
 
 def main():
     """主函数"""
     if len(sys.argv) < 2:
         print("使用方法: python md_converter.py <输入文件> [输出文件]")
+        print("          python md_converter.py <目录或通配符> [输出目录]")
         print("示例: python md_converter.py input.md output.md")
+        print("      python md_converter.py docs/ out/")
+        print("      python md_converter.py 'docs/*.md'")
         sys.exit(1)
     
     input_file = sys.argv[1]
     
+    # 输入为目录或通配符时批量转换
+    if is_batch_input(input_file):
+        _batch_main(input_file, sys.argv[2] if len(sys.argv) >= 3 else None)
+        return
+    
     # 如果没有指定输出文件，自动生成
     if len(sys.argv) >= 3:
         output_file = sys.argv[2]
     else:
-        base_name = os.path.splitext(input_file)[0]
-        output_file = f"{base_name}（转换版）.md"
+        output_file = _default_output_path(input_file)
     
     # 创建转换器实例
     converter = MarkdownConverter()
@@ -10,11 +10,51 @@ Markdown to XMind Converter
 import os
 import re
 import json
-import tempfile
-from typing import Dict, List, Any, Optional
+import itertools
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
+
+from convert_common import batch_convert, expand_inputs, is_batch_input, match_header
 
 # 不再依赖第三方 xmind SDK。改为直接生成 XMind 2020+ 采用的 JSON 打包格式。
 
+try:
+    # 可选依赖：orjson 直接输出 UTF-8 字节，比标准库 json 快数倍
+    import orjson
+except ImportError:
+    orjson = None
+
+# 已确认存在的输出目录，批量转换到同一目录时无需反复创建
+_KNOWN_DIRS = set()
+
+# 列表项正则，模块加载时编译一次。内容部分以 \S 开头，
+# 与前面的 \s+ 没有重叠，匹配失败时不会回溯
+_LIST_RE = re.compile(r'^(\s*)([-*+])\s+(\S.*)$')
+
+
+def _dumps(obj: Any) -> bytes:
+    """
+    将对象序列化为紧凑的 UTF-8 JSON 字节，优先使用 orjson
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _id_generator() -> Callable[[], str]:
+    """
+    创建主题 ID 生成器
+    
+    ID 只需在文件内唯一：每个文件只取一次随机前缀，之后拼接递增计数，
+    避免每个主题都调用 uuid4() 读取一次系统随机数
+    """
+    prefix = os.urandom(8).hex()
+    counter = itertools.count()
+    
+    def uid() -> str:
+        return f'{prefix}{next(counter):016x}'  # 32 位十六进制，与 uuid4().hex 等长
+    
+    return uid
+
 
 class MarkdownToXMindConverter:
     """Markdown 到 XMind 转换器"""
@@ -36,12 +76,10 @@ class MarkdownToXMindConverter:
         if not os.path.exists(md_file):
             raise FileNotFoundError(f"Markdown 文件不存在: {md_file}")
         
-        # 读取 Markdown 文件
+        # 逐行读取并解析 Markdown 内容，直接得到 XMind 主题结构
+        uid = _id_generator()
         with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 解析 Markdown 内容
-        structure = self._parse_markdown(content)
+            root = self._parse_markdown(f, uid)
         
         # 生成输出文件名
         if output_file is None:
@@ -49,28 +87,65 @@ class MarkdownToXMindConverter:
             output_file = f"{base_name}.xmind"
         
         # 创建 XMind 文件（JSON 打包格式）
-        self._create_xmind(structure, output_file)
+        self._create_xmind(root, output_file, uid)
         
         print(f"转换完成: {md_file} -> {output_file}")
         return output_file
     
-    def _parse_markdown(self, content: str) -> Dict[str, Any]:
+    @classmethod
+    def batch_convert(cls, paths: List[str], output_dir: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """
+        使用多进程批量转换多个 Markdown 文件
+        
+        Args:
+            paths: Markdown 文件路径列表
+            output_dir: 输出目录（保留输入文件的相对子目录），为 None 时输出到各输入文件所在目录
+            
+        Returns:
+            (输入文件, 输出文件) 列表，转换失败时输出文件为 None
+            
+        Raises:
+            ValueError: 两个输入文件会输出到同一路径时
+        """
+        return batch_convert(cls, 'convert_file', paths, output_dir, '.xmind')
+    
+    def _parse_markdown(self, lines: Iterable[str], uid: Callable[[], str]) -> Dict[str, Any]:
         """
         解析 Markdown 内容
         
+        解析过程中直接构建 XMind 主题（id/class/title/notes/children），
+        不再先生成中间结构再转换一遍。
+        
         Args:
-            content: Markdown 内容
+            lines: Markdown 内容的逐行迭代器（如打开的文件对象）
+            uid: 主题 ID 生成器
             
         Returns:
-            解析后的结构
+            根主题
         """
-        lines = content.split('\n')
-        structure = {
-            'title': 'Markdown 思维导图',
-            'children': []
-        }
+        def new_topic(title: str) -> Dict[str, Any]:
+            return {
+                'id': uid(),
+                'class': 'topic',
+                'title': title
+            }
         
-        current_path = [structure]
+        def attach(parent: Dict[str, Any], topic: Dict[str, Any]):
+            children = parent.get('children')
+            if children is None:
+                parent['children'] = {
+                    'attached': [topic]
+                }
+            else:
+                children['attached'].append(topic)
+        
+        root = new_topic('Markdown 思维导图')
+        
+        # 当前路径使用预分配的定长栈 + 深度计数，截断路径只需修改 depth，
+        # 无需逐个 pop。标题最多 6 级，加上根主题共 7 层，一般不会扩容
+        current_path: List[Optional[Dict[str, Any]]] = [None] * 8
+        current_path[0] = root
+        depth = 1
         
         for line in lines:
             line = line.strip()
@@ -78,117 +153,89 @@ class MarkdownToXMindConverter:
                 continue
             
             # 处理标题
-            header_match = re.match(r'^(#{1,6})\s+(.+)$', line)
+            header_match = match_header(line) if line.startswith('#') else None
             if header_match:
-                level = len(header_match.group(1))
-                title = header_match.group(2).strip()
+                level, title = header_match  # 标题内容已统一为 NFC
                 
                 # 创建新节点
-                node = {
-                    'title': title,
-                    'children': []
-                }
+                node = new_topic(title)
                 
                 # 调整路径到正确的层级
-                while len(current_path) > level:
-                    current_path.pop()
+                if depth > level:
+                    depth = level
                 
                 # 添加到父节点
-                if len(current_path) == 0:
-                    current_path = [structure]
-                
-                current_path[-1]['children'].append(node)
-                current_path.append(node)
+                attach(current_path[depth - 1], node)
+                if depth == len(current_path):
+                    current_path.append(node)
+                else:
+                    current_path[depth] = node
+                depth += 1
                 
                 # 如果是一级标题且是第一个，设为根标题
-                if level == 1 and len(structure['children']) == 1:
-                    structure['title'] = title
+                if level == 1 and len(root['children']['attached']) == 1:
+                    root['title'] = title
                 
                 continue
             
             # 处理列表项
-            list_match = re.match(r'^(\s*)([-*+])\s+(.+)$', line)
+            list_match = _LIST_RE.match(line)
             if list_match:
                 indent = len(list_match.group(1))
                 title = list_match.group(3).strip()
                 level = (indent // 2) + 1  # 每两个空格为一级
                 
                 # 创建新节点
-                node = {
-                    'title': title,
-                    'children': []
-                }
+                node = new_topic(title)
                 
                 # 调整路径到正确的层级
-                while len(current_path) > level + 1:
-                    current_path.pop()
+                if depth > level + 1:
+                    depth = level + 1
                 
-                # 确保有足够的层级
-                if len(current_path) == 0:
-                    current_path = [structure]
-                
-                current_path[-1]['children'].append(node)
-                current_path.append(node)
+                attach(current_path[depth - 1], node)
+                if depth == len(current_path):
+                    current_path.append(node)
+                else:
+                    current_path[depth] = node
+                depth += 1
                 
                 continue
             
             # 处理普通文本（作为备注或子节点）
-            if line and len(current_path) > 1:
-                # 如果当前节点没有子节点，将文本作为备注
-                current_node = current_path[-1]
-                if not current_node['children']:
-                    if 'note' not in current_node:
-                        current_node['note'] = line
+            if line and depth > 1:
+                # 如果当前节点没有子节点，将文本作为备注（按新格式写入 plain 文本）
+                current_node = current_path[depth - 1]
+                if 'children' not in current_node:
+                    if 'notes' not in current_node:
+                        current_node['notes'] = {
+                            'plain': {
+                                'content': line
+                            }
+                        }
                     else:
-                        current_node['note'] += '\n' + line
+                        current_node['notes']['plain']['content'] += '\n' + line
                 else:
                     # 否则作为子节点
-                    text_node = {
-                        'title': line,
-                        'children': []
-                    }
-                    current_node['children'].append(text_node)
+                    current_node['children']['attached'].append(new_topic(line))
         
-        return structure
+        return root
     
-    def _create_xmind(self, structure: Dict[str, Any], output_file: str):
+    def _create_xmind(self, root: Dict[str, Any], output_file: str, uid: Callable[[], str]):
         """
         创建 XMind 文件（JSON 打包：content.json、metadata.json、manifest.json）
+        
+        Args:
+            root: _parse_markdown 生成的根主题
+            output_file: 输出文件路径
+            uid: 主题 ID 生成器（与解析时共用，保证文件内 ID 唯一）
         """
-        import uuid
         import zipfile
         
-        def uid():
-            return uuid.uuid4().hex  # 任意唯一ID
-        
-        def build_topic(node: Dict[str, Any]) -> Dict[str, Any]:
-            topic = {
-                'id': uid(),
-                'class': 'topic',
-                'title': node.get('title', '')
-            }
-            # 备注（按新格式写入 plain 文本）
-            if 'note' in node:
-                topic['notes'] = {
-                    'plain': {
-                        'content': node['note']
-                    }
-                }
-            children = [build_topic(ch) for ch in node.get('children', [])]
-            if children:
-                topic['children'] = {
-                    'attached': children
-                }
-            return topic
-        
-        # 根主题
-        root = build_topic({'title': structure.get('title', '思维导图'), 'children': structure.get('children', [])})
-        
         # 单个 sheet
         sheet = {
             'id': uid(),
             'class': 'sheet',
-            'title': structure.get('title', '思维导图'),
+            'title': root['title'],
             'rootTopic': root
         }
         
@@ -209,20 +256,32 @@ class MarkdownToXMindConverter:
             }
         }
         
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        # 确保输出目录存在，以绝对路径记录，切换工作目录后仍然有效
+        output_dir = os.path.dirname(output_file) or '.'
+        dir_key = os.path.abspath(output_dir)
+        if dir_key not in _KNOWN_DIRS:
+            os.makedirs(output_dir, exist_ok=True)
+            _KNOWN_DIRS.add(dir_key)
         
-        # 打包写入
-        with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as z:
-            z.writestr('content.json', json.dumps(content, ensure_ascii=False, separators=(',', ':')))
-            z.writestr('metadata.json', json.dumps(metadata, ensure_ascii=False, separators=(',', ':')))
-            z.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, separators=(',', ':')))
-    
-    def _add_topics(self, parent_topic, children: List[Dict[str, Any]]):
-        """
-        递归添加主题（旧 XML 方式的占位，保留不再使用）
-        """
-        pass
+        # 先编码为 UTF-8 字节再写入，避免 zipfile 内部再做一次编码
+        content_data = _dumps(content)
+        metadata_data = _dumps(metadata)
+        manifest_data = _dumps(manifest)
+        
+        # 打包写入：content.json 使用较低的压缩级别，压缩率接近默认级别但 CPU 开销更小；
+        # metadata.json、manifest.json 只有几十字节，压缩没有收益，直接存储
+        try:
+            z = zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=3)
+        except FileNotFoundError:
+            # 已记录的目录可能在此期间被删除，重新创建后重试一次
+            _KNOWN_DIRS.discard(dir_key)
+            os.makedirs(output_dir, exist_ok=True)
+            _KNOWN_DIRS.add(dir_key)
+            z = zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=3)
+        with z:
+            z.writestr('content.json', content_data)
+            z.writestr('metadata.json', metadata_data, compress_type=zipfile.ZIP_STORED)
+            z.writestr('manifest.json', manifest_data, compress_type=zipfile.ZIP_STORED)
 
 
 def main():
@@ -230,11 +289,26 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='将 Markdown 文件转换为 XMind 思维导图')
-    parser.add_argument('input_file', help='输入的 Markdown 文件路径')
-    parser.add_argument('-o', '--output', help='输出的 XMind 文件路径')
+    parser.add_argument('input_file', help='输入的 Markdown 文件路径，也可以是目录或通配符（批量转换）')
+    parser.add_argument('-o', '--output', help='输出的 XMind 文件路径（批量转换时为输出目录，不指定则输出到各输入文件所在目录）')
     
     args = parser.parse_args()
     
+    # 输入为目录或通配符时批量转换
+    if is_batch_input(args.input_file):
+        paths = expand_inputs(args.input_file, '.md')
+        if not paths:
+            print(f"转换失败: {args.input_file} 中没有找到 Markdown 文件")
+            return 1
+        try:
+            results = MarkdownToXMindConverter.batch_convert(paths, args.output)
+        except ValueError as e:
+            print(f"转换失败: {str(e)}")
+            return 1
+        failed = [path for path, output_file in results if output_file is None]
+        print(f"批量转换完成！成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+        return 1 if failed else 0
+    
     try:
         converter = MarkdownToXMindConverter()
         output_file = converter.convert_file(args.input_file, args.output)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量转换测试
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from md_converter import MarkdownConverter, _batch_main  # noqa: E402
+from md_to_xmind import MarkdownToXMindConverter  # noqa: E402
+from xmind_to_md import XMindToMarkdownConverter  # noqa: E402
+
+
+class MarkdownBatchConvertTest(unittest.TestCase):
+    """Markdown 标题层级批量转换"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.addCleanup(self._tmp.cleanup)
+
+        self.inputs = []
+        for sub in ('x', 'y'):
+            md_file = os.path.join(self.tmp, sub, 'a.md')
+            os.makedirs(os.path.dirname(md_file))
+            with open(md_file, 'w', encoding='utf-8') as f:
+                f.write(f'# {sub}\n## 章节\n### 小节\n')
+            self.inputs.append(md_file)
+
+    def test_batch_next_to_inputs(self):
+        """不指定输出目录时输出到各输入文件所在目录"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = MarkdownConverter.batch_convert(self.inputs)
+
+        expected = [os.path.join(self.tmp, sub, 'a（转换版）.md') for sub in ('x', 'y')]
+        self.assertEqual(results, list(zip(self.inputs, expected)))
+        for output_file in expected:
+            with open(output_file, encoding='utf-8') as f:
+                self.assertIn('## 小节', f.read())
+
+    def test_directory_scan_skips_own_outputs(self):
+        """再次扫描目录时跳过已生成的（转换版）文件"""
+        directory = os.path.dirname(self.inputs[0])
+        with contextlib.redirect_stdout(io.StringIO()):
+            _batch_main(directory)
+            _batch_main(directory)
+
+        self.assertEqual(sorted(os.listdir(directory)), ['a.md', 'a（转换版）.md'])
+
+    def test_save_after_output_directory_removed(self):
+        """输出目录在两次保存之间被删除时重新创建"""
+        converter = MarkdownConverter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(converter.read_file(self.inputs[0]))
+        converter.convert()
+        output_dir = os.path.join(self.tmp, 'out')
+        output_file = os.path.join(output_dir, 'a.md')
+
+        self.assertTrue(converter.save_file(output_file))
+        shutil.rmtree(output_dir)
+        self.assertTrue(converter.save_file(output_file))
+        self.assertTrue(os.path.isfile(output_file))
+
+
+class MarkdownToXMindBatchConvertTest(unittest.TestCase):
+    """Markdown 到 XMind 批量转换"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_same_name_in_different_directories(self):
+        """不同目录下的同名文件保留相对子目录，不会互相覆盖"""
+        inputs = []
+        for sub in ('x', 'y'):
+            md_file = os.path.join(self.tmp, 'docs', sub, 'a.md')
+            os.makedirs(os.path.dirname(md_file))
+            with open(md_file, 'w', encoding='utf-8') as f:
+                f.write(f'# {sub}\n')
+            inputs.append(md_file)
+        output_dir = os.path.join(self.tmp, 'out')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = MarkdownToXMindConverter.batch_convert(inputs, output_dir)
+
+        expected = [os.path.join(output_dir, 'x', 'a.xmind'), os.path.join(output_dir, 'y', 'a.xmind')]
+        self.assertEqual(results, list(zip(inputs, expected)))
+        for output_file in expected:
+            self.assertTrue(os.path.isfile(output_file))
+
+    def test_convert_after_output_directory_removed(self):
+        """输出目录在两次转换之间被删除时重新创建"""
+        md_file = os.path.join(self.tmp, 'a.md')
+        with open(md_file, 'w', encoding='utf-8') as f:
+            f.write('# a\n')
+        output_dir = os.path.join(self.tmp, 'out')
+        output_file = os.path.join(output_dir, 'a.xmind')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            MarkdownToXMindConverter().convert_file(md_file, output_file)
+            shutil.rmtree(output_dir)
+            MarkdownToXMindConverter().convert_file(md_file, output_file)
+        self.assertTrue(os.path.isfile(output_file))
+
+
+class XMindToMarkdownBatchConvertTest(unittest.TestCase):
+    """XMind 到 Markdown 批量转换"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.addCleanup(self._tmp.cleanup)
+
+        # 先用 md_to_xmind 生成两个 XMind 文件作为输入
+        self.inputs = []
+        for name in ('a', 'b'):
+            md_file = os.path.join(self.tmp, f'{name}.md')
+            with open(md_file, 'w', encoding='utf-8') as f:
+                f.write(f'# {name}\n## 子主题\n- 列表项\n')
+            xmind_file = os.path.join(self.tmp, 'xm', f'{name}.xmind')
+            with contextlib.redirect_stdout(io.StringIO()):
+                MarkdownToXMindConverter().convert_file(md_file, xmind_file)
+            self.inputs.append(xmind_file)
+
+    def test_batch_into_new_directory(self):
+        """输出目录不存在时自动创建"""
+        output_dir = os.path.join(self.tmp, 'out', 'nested')
+        self.assertFalse(os.path.exists(output_dir))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = XMindToMarkdownConverter.batch_convert(self.inputs, output_dir)
+
+        expected = [os.path.join(output_dir, 'a.md'), os.path.join(output_dir, 'b.md')]
+        self.assertEqual(results, list(zip(self.inputs, expected)))
+        for output_file in expected:
+            with open(output_file, encoding='utf-8') as f:
+                self.assertTrue(f.read().startswith('# '))
+
+    def test_conflicting_output_paths(self):
+        """同目录下主文件名相同的输入会输出到同一路径，提交前报错"""
+        other = os.path.join(self.tmp, 'xm', 'a.zip')
+        with open(self.inputs[0], 'rb') as src, open(other, 'wb') as dst:
+            dst.write(src.read())
+        output_dir = os.path.join(self.tmp, 'out')
+
+        with self.assertRaises(ValueError):
+            XMindToMarkdownConverter.batch_convert([self.inputs[0], other], output_dir)
+        self.assertFalse(os.path.exists(output_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,25 +7,59 @@ XMind to Markdown Converter
 支持多级标题、列表和基本的思维导图结构。
 """
 
+import io
 import os
 import sys
 import argparse
 import json
-from typing import Dict, List, Any, Optional
+import zipfile
+from typing import Dict, List, Any, Optional, Tuple
+
+from convert_common import batch_convert, expand_inputs, is_batch_input
 
 try:
+    # 仅读取旧版（XML 格式）XMind 文件时需要
     import xmindparser
 except ImportError:
-    print("错误: 请先安装 xmindparser 库")
-    print("运行: pip install xmindparser")
-    sys.exit(1)
+    xmindparser = None
+
+try:
+    # 可选依赖：orjson 解析 JSON 比标准库更快
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# 预先生成 1~6 级标题前缀和常用缩进，避免每个主题都重复做字符串乘法
+_H_PREFIX = tuple('#' * n + ' ' for n in range(1, 7))
+_INDENT = tuple('  ' * n for n in range(64))
 
 
 class XMindToMarkdownConverter:
     """XMind 到 Markdown 转换器"""
     
     def __init__(self):
-        self.output_lines = []
+        self._reset_output()
+    
+    def _reset_output(self):
+        """重置输出缓冲区"""
+        # 不预分配容量：空 StringIO 只追加写入时内部按几何增长，开销很小；
+        # 用初始值预占空间会切换为 UCS4 缓冲区，峰值内存约翻倍，而预估大小还需额外遍历一次主题树
+        self._buf = io.StringIO()
+        self._has_output = False
+    
+    def _write_line(self, line: str):
+        """写入一行到输出缓冲区"""
+        # 换行符写在行首（第一行除外），结果与按行 '\\n'.join 一致，取值时无需再截掉末尾换行
+        if self._has_output:
+            self._buf.write('\n')
+        else:
+            self._has_output = True
+        self._buf.write(line)
+    
+    def _getvalue(self) -> str:
+        """取出输出内容"""
+        return self._buf.getvalue()
     
     def convert_file(self, xmind_file: str, output_file: Optional[str] = None) -> str:
         """
@@ -43,18 +77,18 @@ class XMindToMarkdownConverter:
         
         # 解析 XMind 文件
         try:
-            content = xmindparser.xmind_to_dict(xmind_file)
+            content = self._load_xmind(xmind_file)
         except Exception as e:
             raise Exception(f"解析 XMind 文件失败: {str(e)}")
         
         # 重置输出
-        self.output_lines = []
+        self._reset_output()
         
         # 转换内容
         self._convert_content(content)
         
         # 生成 Markdown 内容
-        markdown_content = '\n'.join(self.output_lines)
+        markdown_content = self._getvalue()
         
         # 保存到文件
         if output_file is None:
@@ -67,6 +101,75 @@ class XMindToMarkdownConverter:
         print(f"转换完成: {xmind_file} -> {output_file}")
         return markdown_content
     
+    def _load_xmind(self, xmind_file: str) -> List[Dict[str, Any]]:
+        """
+        读取 XMind 文件
+        
+        XMind 2020+ 格式是包含 content.json 的 ZIP，直接用 zipfile + JSON 读取；
+        只有旧版 XML 格式才交给 xmindparser 解析。
+        
+        Args:
+            xmind_file: XMind 文件路径
+            
+        Returns:
+            与 xmindparser.xmind_to_dict 结构一致的 sheet 列表
+        """
+        with zipfile.ZipFile(xmind_file) as z:
+            if 'content.json' in z.namelist():
+                sheets = _loads(z.read('content.json'))
+                return [
+                    {'title': sheet['title'], 'topic': self._normalize_topic(sheet['rootTopic'])}
+                    for sheet in sheets
+                ]
+        
+        if xmindparser is None:
+            raise Exception("旧版 XMind 文件需要 xmindparser 库，请运行: pip install xmindparser")
+        return xmindparser.xmind_to_dict(xmind_file)
+    
+    def _normalize_topic(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将 content.json 中的主题转换为 xmindparser 的结构（title/note/topics）
+        
+        Args:
+            node: content.json 中的主题
+            
+        Returns:
+            转换后的主题
+        """
+        root = None
+        # 用显式栈代替递归，栈元素为 (主题, 父主题的 topics 列表)
+        stack = [(node, None)]
+        while stack:
+            node, siblings = stack.pop()
+            title = node.get('title', '')
+            # 附件主题与 xmindparser 一样加上前缀
+            if (node.get('href') or '').startswith('xap:attachments'):
+                title = f"[Attachment]{title}"
+            topic = {'title': title}
+            
+            # 备注
+            notes = node.get('notes')
+            if notes:
+                plain = notes.get('plain')
+                if plain:
+                    note = plain.get('content', '').strip()
+                    if note:
+                        topic['note'] = note
+            
+            # 子主题（逆序压栈以保持原有顺序）
+            children = node.get('children')
+            attached = children.get('attached') if children else None
+            if attached:
+                topic['topics'] = []
+                for child in reversed(attached):
+                    stack.append((child, topic['topics']))
+            
+            if siblings is None:
+                root = topic
+            else:
+                siblings.append(topic)
+        return root
+    
     def _convert_content(self, content: List[Dict[str, Any]]):
         """
         转换 XMind 内容到 Markdown
@@ -86,37 +189,45 @@ class XMindToMarkdownConverter:
             topic: 主题数据
             level: 标题级别
         """
-        # 获取主题标题
-        title = topic.get('title', '未命名主题')
-        
-        # 根据级别生成标题
-        if level <= 6:
-            # 使用 Markdown 标题格式
-            header = '#' * level + ' ' + title
-            self.output_lines.append(header)
-        else:
-            # 超过 6 级使用列表格式
-            indent = '  ' * (level - 7)
-            self.output_lines.append(f"{indent}- {title}")
-        
-        # 添加备注
-        if 'note' in topic:
-            note = topic['note'].strip()
-            if note:
-                self.output_lines.append('')
-                # 将备注作为引用块
-                for line in note.split('\n'):
-                    self.output_lines.append(f"> {line}")
-                self.output_lines.append('')
-        
-        # 处理子主题
-        if 'topics' in topic:
-            for subtopic in topic['topics']:
-                self._convert_topic(subtopic, level + 1)
-        
-        # 在同级主题之间添加空行
-        if level <= 3:
-            self.output_lines.append('')
+        # 用显式栈代替递归，避免层级很深时触发 RecursionError。
+        # 栈元素为 (主题, 级别)；主题为 None 表示某个主题的子树已输出完毕
+        stack = [(topic, level)]
+        while stack:
+            topic, level = stack.pop()
+            if topic is None:
+                # 在同级主题之间添加空行
+                self._write_line('')
+                continue
+            
+            # 获取主题标题
+            title = topic.get('title', '未命名主题')
+            
+            # 根据级别生成标题
+            if level <= 6:
+                # 使用 Markdown 标题格式
+                self._write_line(_H_PREFIX[level - 1] + title)
+            else:
+                # 超过 6 级使用列表格式
+                depth = level - 7
+                indent = _INDENT[depth] if depth < len(_INDENT) else '  ' * depth
+                self._write_line(f"{indent}- {title}")
+            
+            # 添加备注
+            if 'note' in topic:
+                note = topic['note'].strip()
+                if note:
+                    # 将备注作为引用块（前后各空一行），整块一次写入；
+                    # 备注总是跟在标题行之后，因此以换行开头
+                    self._buf.write('\n\n> ' + '\n> '.join(note.splitlines()) + '\n')
+            
+            # 子主题全部输出后再补空行，因此先压入结束标记
+            if level <= 3:
+                stack.append((None, level))
+            
+            # 处理子主题（逆序压栈以保持原有顺序）
+            if 'topics' in topic:
+                for subtopic in reversed(topic['topics']):
+                    stack.append((subtopic, level + 1))
     
     def convert_to_list_format(self, xmind_file: str, output_file: Optional[str] = None) -> str:
         """
@@ -133,17 +244,17 @@ class XMindToMarkdownConverter:
             raise FileNotFoundError(f"XMind 文件不存在: {xmind_file}")
         
         try:
-            content = xmindparser.xmind_to_dict(xmind_file)
+            content = self._load_xmind(xmind_file)
         except Exception as e:
             raise Exception(f"解析 XMind 文件失败: {str(e)}")
         
-        self.output_lines = []
+        self._reset_output()
         
         for sheet in content:
             if 'topic' in sheet:
                 self._convert_topic_to_list(sheet['topic'], level=0)
         
-        markdown_content = '\n'.join(self.output_lines)
+        markdown_content = self._getvalue()
         
         if output_file is None:
             base_name = os.path.splitext(os.path.basename(xmind_file))[0]
@@ -155,6 +266,27 @@ class XMindToMarkdownConverter:
         print(f"转换完成 (列表格式): {xmind_file} -> {output_file}")
         return markdown_content
     
+    @classmethod
+    def batch_convert(cls, paths: List[str], output_dir: Optional[str] = None,
+                      list_format: bool = False) -> List[Tuple[str, Optional[str]]]:
+        """
+        使用多进程批量转换多个 XMind 文件
+        
+        Args:
+            paths: XMind 文件路径列表
+            output_dir: 输出目录（保留输入文件的相对子目录），为 None 时输出到各输入文件所在目录
+            list_format: 是否使用列表格式
+            
+        Returns:
+            (输入文件, 输出文件) 列表，转换失败时输出文件为 None
+            
+        Raises:
+            ValueError: 两个输入文件会输出到同一路径时
+        """
+        if list_format:
+            return batch_convert(cls, 'convert_to_list_format', paths, output_dir, '_list.md')
+        return batch_convert(cls, 'convert_file', paths, output_dir, '.md')
+    
     def _convert_topic_to_list(self, topic: Dict[str, Any], level: int = 0):
         """
         转换主题到列表格式
@@ -163,28 +295,33 @@ class XMindToMarkdownConverter:
             topic: 主题数据
             level: 缩进级别
         """
-        title = topic.get('title', '未命名主题')
-        indent = '  ' * level
-        
-        if level == 0:
-            # 根主题使用一级标题
-            self.output_lines.append(f"# {title}")
-            self.output_lines.append('')
-        else:
-            # 子主题使用列表
-            self.output_lines.append(f"{indent}- {title}")
-        
-        # 添加备注
-        if 'note' in topic:
-            note = topic['note'].strip()
-            if note:
-                for line in note.split('\n'):
-                    self.output_lines.append(f"{indent}  > {line}")
-        
-        # 处理子主题
-        if 'topics' in topic:
-            for subtopic in topic['topics']:
-                self._convert_topic_to_list(subtopic, level + 1)
+        # 用显式栈代替递归，栈元素为 (主题, 缩进级别)
+        stack = [(topic, level)]
+        while stack:
+            topic, level = stack.pop()
+            title = topic.get('title', '未命名主题')
+            indent = _INDENT[level] if level < len(_INDENT) else '  ' * level
+            
+            if level == 0:
+                # 根主题使用一级标题
+                self._write_line(f"# {title}")
+                self._write_line('')
+            else:
+                # 子主题使用列表
+                self._write_line(f"{indent}- {title}")
+            
+            # 添加备注
+            if 'note' in topic:
+                note = topic['note'].strip()
+                if note:
+                    # 将备注作为引用块，整块一次写入；备注总是跟在标题行之后，因此以换行开头
+                    prefix = '\n' + indent + '  > '
+                    self._buf.write(prefix + prefix.join(note.splitlines()))
+            
+            # 处理子主题（逆序压栈以保持原有顺序）
+            if 'topics' in topic:
+                for subtopic in reversed(topic['topics']):
+                    stack.append((subtopic, level + 1))
 
 
 def main():
@@ -198,16 +335,35 @@ def main():
   python xmind_to_md.py input.xmind -o output.md      # 指定输出文件
   python xmind_to_md.py input.xmind --list            # 转换为列表格式
   python xmind_to_md.py input.xmind --list -o list.md # 列表格式并指定输出文件
+  python xmind_to_md.py xminds/ -o out/               # 批量转换目录下所有 XMind 文件
+  python xmind_to_md.py "xminds/*.xmind"              # 批量转换通配符匹配的文件
         """
     )
     
-    parser.add_argument('input', help='输入的 XMind 文件路径')
-    parser.add_argument('-o', '--output', help='输出的 Markdown 文件路径')
+    parser.add_argument('input', help='输入的 XMind 文件路径，也可以是目录或通配符（批量转换）')
+    parser.add_argument('-o', '--output', help='输出的 Markdown 文件路径（批量转换时为输出目录，不指定则输出到各输入文件所在目录）')
     parser.add_argument('--list', action='store_true', help='使用列表格式而不是标题格式')
     parser.add_argument('--version', action='version', version='XMind to Markdown Converter 1.0')
     
     args = parser.parse_args()
     
+    # 输入为目录或通配符时批量转换
+    if is_batch_input(args.input):
+        paths = expand_inputs(args.input, '.xmind')
+        if not paths:
+            print(f"错误: {args.input} 中没有找到 XMind 文件")
+            sys.exit(1)
+        try:
+            results = XMindToMarkdownConverter.batch_convert(paths, args.output, args.list)
+        except ValueError as e:
+            print(f"错误: {str(e)}")
+            sys.exit(1)
+        failed = [path for path, output_file in results if output_file is None]
+        print(f"批量转换完成！成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+        if failed:
+            sys.exit(1)
+        return
+    
     try:
         converter = XMindToMarkdownConverter()
         